@@ -7,6 +7,13 @@ from datetime import datetime, timedelta
 import io
 import base64
 
+from catalog import load_catalog
+from dataset_cache import registry, filter_view
+from planning import estimate_planning_inputs, optimize_session_plan
+from forecasting import forecast_objectives
+from simulation import run_monte_carlo, summarize_simulation
+from live import get_live_feed
+
 # Configuration initiale de la page Streamlit
 st.set_page_config(
     page_title="ECF BEQUET - Analyse de Performance",
@@ -26,103 +33,59 @@ def generate_training_data(n_formations=10, n_sessions=50):
     """
     np.random.seed(42)
     
-    # Liste des formations proposées dans le secteur transport/logistique/BTP
-    formations = [
-        "Transport routier de marchandises", 
-        "CACES R489 - Cariste", 
-        "Formation permis C", 
-        "Formation permis CE",
-        "Formation logistique entrepôt",
-        "Formation BTP - Engins de chantier",
-        "Formation FCO Transport",
-        "Sécurité routière professionnelle",
-        "Éco-conduite",
-        "Transport de matières dangereuses"
-    ]
-    
-    # Catégories de formations
-    formation_to_category = {
-        "Transport routier de marchandises": "Transport",
-        "CACES R489 - Cariste": "Logistique",
-        "Formation permis C": "Transport",
-        "Formation permis CE": "Transport",
-        "Formation logistique entrepôt": "Logistique",
-        "Formation BTP - Engins de chantier": "BTP",
-        "Formation FCO Transport": "Transport",
-        "Sécurité routière professionnelle": "Sécurité",
-        "Éco-conduite": "Transport",
-        "Transport de matières dangereuses": "Transport"
-    }
-    
-    # Coûts et prix des formations
-    formation_costs = {
-        "Transport routier de marchandises": 1200, 
-        "CACES R489 - Cariste": 900, 
-        "Formation permis C": 1500, 
-        "Formation permis CE": 1800,
-        "Formation logistique entrepôt": 850,
-        "Formation BTP - Engins de chantier": 1700,
-        "Formation FCO Transport": 950,
-        "Sécurité routière professionnelle": 600,
-        "Éco-conduite": 500,
-        "Transport de matières dangereuses": 1100
-    }
-    
-    formation_prices = {
-        "Transport routier de marchandises": 1800, 
-        "CACES R489 - Cariste": 1400, 
-        "Formation permis C": 2300, 
-        "Formation permis CE": 2800,
-        "Formation logistique entrepôt": 1300,
-        "Formation BTP - Engins de chantier": 2600,
-        "Formation FCO Transport": 1500,
-        "Sécurité routière professionnelle": 900,
-        "Éco-conduite": 700,
-        "Transport de matières dangereuses": 1700
-    }
+    # Formations, catégories, sites, coûts et prix issus du catalogue de référence
+    catalog = load_catalog()
     
     # Dates sur les 12 derniers mois
     end_date = datetime.now()
     start_date = end_date - timedelta(days=365)
     dates = [start_date + timedelta(days=x) for x in range((end_date - start_date).days)]
     
-    # Sites de formation d'ECF BEQUET
-    sites = ["Auneau", "Gellainville"]
+    # Tirages par session (codes entiers de formation et de site)
+    formation_codes = np.empty(n_sessions, dtype=int)
+    site_codes = np.empty(n_sessions, dtype=int)
+    session_dates = []
+    capacity = np.empty(n_sessions, dtype=int)
+    registrations = np.empty(n_sessions, dtype=int)
+    attendance = np.empty(n_sessions, dtype=int)
+    cost_variation = np.empty(n_sessions, dtype=int)
+    price_variation = np.empty(n_sessions, dtype=int)
+    satisfaction = np.empty(n_sessions)
     
-    # Génération des données
-    data = []
     for i in range(n_sessions):
-        formation = np.random.choice(formations)
-        session_date = np.random.choice(dates)
-        site = np.random.choice(sites)
-        capacity = np.random.randint(8, 16)
-        registrations = np.random.randint(4, capacity + 1)
-        attendance = np.random.randint(registrations - 2 if registrations > 2 else registrations, registrations + 1)
-        cost = formation_costs[formation] + np.random.randint(-100, 101)  # Variation du coût
-        price = formation_prices[formation] + np.random.randint(-200, 201)  # Variation du prix
-        revenue = attendance * price
-        profit = revenue - cost
-        satisfaction = round(np.random.normal(8, 1), 1)  # Note de satisfaction sur 10
-        
-        data.append({
-            "Formation": formation,
-            "Catégorie": formation_to_category[formation],
-            "Date": session_date,
-            "Site": site,
-            "Capacité": capacity,
-            "Inscrits": registrations,
-            "Présents": attendance,
-            "TauxRemplissage": round(registrations / capacity * 100, 1),
-            "TauxPrésence": round(attendance / registrations * 100, 1) if registrations > 0 else 0,
-            "Coût": cost,
-            "PrixVente": price,
-            "Revenu": revenue,
-            "Bénéfice": profit,
-            "MargeNette": round(profit / revenue * 100, 1) if revenue > 0 else 0,
-            "Satisfaction": satisfaction
-        })
-    
-    return pd.DataFrame(data)
+        formation_codes[i] = np.random.randint(len(catalog.formations))
+        session_dates.append(np.random.choice(dates))
+        site_codes[i] = np.random.randint(len(catalog.sites))
+        capacity[i] = np.random.randint(8, 16)
+        registrations[i] = np.random.randint(4, capacity[i] + 1)
+        attendance[i] = np.random.randint(registrations[i] - 2 if registrations[i] > 2 else registrations[i], registrations[i] + 1)
+        cost_variation[i] = np.random.randint(-100, 101)  # Variation du coût
+        price_variation[i] = np.random.randint(-200, 201)  # Variation du prix
+        satisfaction[i] = round(np.random.normal(8, 1), 1)  # Note de satisfaction sur 10
+    
+    # Enrichissement par indexation des tables du catalogue
+    cost = catalog.cost[formation_codes] + cost_variation
+    price = catalog.price[formation_codes] + price_variation
+    revenue = attendance * price
+    profit = revenue - cost
+    
+    return pd.DataFrame({
+        "Formation": catalog.formation_column(formation_codes),
+        "Catégorie": catalog.category_column(formation_codes),
+        "Date": pd.to_datetime(session_dates),
+        "Site": catalog.site_column(site_codes),
+        "Capacité": capacity,
+        "Inscrits": registrations,
+        "Présents": attendance,
+        "TauxRemplissage": np.round(registrations / capacity * 100, 1),
+        "TauxPrésence": np.round(np.divide(attendance * 100, registrations, out=np.zeros(n_sessions), where=registrations > 0), 1),
+        "Coût": cost,
+        "PrixVente": price,
+        "Revenu": revenue,
+        "Bénéfice": profit,
+        "MargeNette": np.round(np.divide(profit * 100, revenue, out=np.zeros(n_sessions), where=revenue > 0), 1),
+        "Satisfaction": satisfaction
+    })
 
 def generate_satisfaction_data(df):
     """
@@ -147,7 +110,16 @@ def generate_satisfaction_data(df):
                 "SatisfactionGlobale": round(np.random.normal(session["Satisfaction"], 0.5), 1)
             })
     
-    return pd.DataFrame(satisfaction_data)
+    return load_catalog().to_categorical(pd.DataFrame(satisfaction_data))
+
+def load_datasets(n_sessions=100):
+    """
+    Génère l'ensemble des données de simulation (sessions et satisfaction)
+    sous la forme attendue par le registre de jeux de données partagé.
+    """
+    df_sessions = generate_training_data(n_sessions=n_sessions)
+    df_satisfaction = generate_satisfaction_data(df_sessions)
+    return {"sessions": df_sessions, "satisfaction": df_satisfaction}
 
 # ============================================================
 # PARTIE 2: FONCTIONS D'ANALYSE ET DE REPORTING
@@ -155,7 +127,7 @@ def generate_satisfaction_data(df):
 
 def analyze_profitability_by_training(df):
     """Analyse la rentabilité par formation."""
-    profitability = df.groupby("Formation").agg({
+    profitability = df.groupby("Formation", observed=True).agg({
         "Revenu": "sum",
         "Bénéfice": "sum",
         "MargeNette": "mean",
@@ -186,7 +158,7 @@ def analyze_monthly_performance(df):
 
 def analyze_by_site(df):
     """Analyse les performances par site."""
-    site_analysis = df.groupby("Site").agg({
+    site_analysis = df.groupby("Site", observed=True).agg({
         "Revenu": "sum",
         "Bénéfice": "sum",
         "MargeNette": "mean",
@@ -200,7 +172,7 @@ def analyze_by_site(df):
 
 def analyze_by_category(df):
     """Analyse les performances par catégorie de formation."""
-    category_analysis = df.groupby("Catégorie").agg({
+    category_analysis = df.groupby("Catégorie", observed=True).agg({
         "Revenu": "sum",
         "Bénéfice": "sum",
         "MargeNette": "mean",
@@ -213,7 +185,7 @@ def analyze_by_category(df):
 
 def analyze_satisfaction(df_satisfaction):
     """Analyse détaillée de la satisfaction client."""
-    satisfaction_analysis = df_satisfaction.groupby("Formation").agg({
+    satisfaction_analysis = df_satisfaction.groupby("Formation", observed=True).agg({
         "ContenuFormation": "mean",
         "QualitéFormateur": "mean",
         "SupportsPédagogiques": "mean",
@@ -242,7 +214,7 @@ def identify_opportunities_and_risks(df):
     Identifie les formations à risque (faible performance) 
     et les opportunités (forte performance).
     """
-    formation_analysis = df.groupby("Formation").agg({
+    formation_analysis = df.groupby("Formation", observed=True).agg({
         "Bénéfice": "sum",
         "MargeNette": "mean",
         "TauxRemplissage": "mean",
@@ -272,7 +244,7 @@ def analyze_commercial_performance(df):
     """Analyse les performances commerciales par site."""
     df_copy = df.copy()
     
-    commercial_metrics = df_copy.groupby("Site").agg({
+    commercial_metrics = df_copy.groupby("Site", observed=True).agg({
         "Capacité": "sum",
         "Inscrits": "sum",
         "Présents": "sum",
@@ -285,37 +257,35 @@ def analyze_commercial_performance(df):
     
     return commercial_metrics
 
-def analyze_objectives_vs_actuals(df):
+def analyze_objectives_vs_actuals(df, horizon=3):
     """
-    Simule une analyse des objectifs vs réalisations pour
-    chaque site de formation.
+    Compare, pour chaque site, les réalisations des `horizon` derniers mois
+    complets aux objectifs issus des prévisions de la demande (modèles
+    ajustés sur les mois précédents).
     """
-    sites = df["Site"].unique()
+    objectives_forecast, actuals = forecast_objectives(df, horizon=horizon)
     objectives = {}
     
-    for site in sites:
-        site_data = df[df["Site"] == site]
-        revenue = site_data["Revenu"].sum()
-        registrations = site_data["Inscrits"].sum()
-        
-        # Simuler des objectifs (120% des réalisations)
-        revenue_objective = revenue * 1.2
-        registrations_objective = registrations * 1.2
+    for site in actuals.index:
+        revenue = actuals.loc[site, "Revenu"]
+        registrations = actuals.loc[site, "Inscrits"]
+        revenue_objective = objectives_forecast.loc[site, "Revenu"]
+        registrations_objective = objectives_forecast.loc[site, "Inscrits"]
         
         objectives[site] = {
-            "RevenusObjectif": revenue_objective,
+            "RevenusObjectif": revenue_objective.round(0),
             "RevenusRéalisation": revenue,
-            "RevenusAtteinte": (revenue / revenue_objective * 100).round(1),
-            "InscriptionsObjectif": registrations_objective,
+            "RevenusAtteinte": (revenue / revenue_objective * 100).round(1) if revenue_objective > 0 else np.nan,
+            "InscriptionsObjectif": registrations_objective.round(0),
             "InscriptionsRéalisation": registrations,
-            "InscriptionsAtteinte": (registrations / registrations_objective * 100).round(1)
+            "InscriptionsAtteinte": (registrations / registrations_objective * 100).round(1) if registrations_objective > 0 else np.nan
         }
     
     return pd.DataFrame(objectives).T
 
 def analyze_top_trainings_by_site(df):
     """Identifie les formations les plus rentables par site."""
-    site_formation_analysis = df.groupby(["Site", "Formation"]).agg({
+    site_formation_analysis = df.groupby(["Site", "Formation"], observed=True).agg({
         "Bénéfice": "sum",
         "MargeNette": "mean",
         "TauxRemplissage": "mean"
@@ -333,9 +303,13 @@ def analyze_top_trainings_by_site(df):
 # PARTIE 3: CRÉATION DE VISUALISATIONS POUR STREAMLIT
 # ============================================================
 
-def plot_profitability_chart(df):
-    """Crée un graphique de rentabilité des formations pour Streamlit."""
-    rentabilite = analyze_profitability_by_training(df)
+def plot_profitability_chart(df=None, rentabilite=None):
+    """
+    Crée un graphique de rentabilité des formations pour Streamlit, à partir
+    des sessions ou d'une analyse de rentabilité déjà calculée.
+    """
+    if rentabilite is None:
+        rentabilite = analyze_profitability_by_training(df)
     fig, ax = plt.subplots(figsize=(10, 6))
     rentabilite_plot = rentabilite.sort_values("Bénéfice", ascending=True).tail(5)
     rentabilite_plot["Bénéfice"].plot(kind="barh", color="green", ax=ax)
@@ -344,9 +318,13 @@ def plot_profitability_chart(df):
     plt.tight_layout()
     return fig
 
-def plot_monthly_trend_chart(df):
-    """Crée un graphique d'évolution mensuelle des revenus et bénéfices pour Streamlit."""
-    performance_mensuelle = analyze_monthly_performance(df)
+def plot_monthly_trend_chart(df=None, performance_mensuelle=None):
+    """
+    Crée un graphique d'évolution mensuelle des revenus et bénéfices pour
+    Streamlit, à partir des sessions ou d'une analyse mensuelle déjà calculée.
+    """
+    if performance_mensuelle is None:
+        performance_mensuelle = analyze_monthly_performance(df)
     fig, ax = plt.subplots(figsize=(10, 6))
     performance_mensuelle[["Revenu", "Bénéfice"]].plot(kind="line", marker="o", ax=ax)
     plt.title("Évolution mensuelle des revenus et bénéfices")
@@ -358,15 +336,19 @@ def plot_monthly_trend_chart(df):
 def plot_filling_rate_chart(df):
     """Crée un graphique des taux de remplissage par formation pour Streamlit."""
     fig, ax = plt.subplots(figsize=(10, 6))
-    df.groupby("Formation")["TauxRemplissage"].mean().sort_values().plot(kind="barh", color="orange", ax=ax)
+    df.groupby("Formation", observed=True)["TauxRemplissage"].mean().sort_values().plot(kind="barh", color="orange", ax=ax)
     plt.title("Taux de remplissage moyen par formation (%)")
     plt.xlabel("Taux de remplissage (%)")
     plt.tight_layout()
     return fig
 
-def plot_revenue_distribution_chart(df):
-    """Crée un graphique de répartition du chiffre d'affaires par catégorie pour Streamlit."""
-    analysis_category = analyze_by_category(df)
+def plot_revenue_distribution_chart(df=None, analysis_category=None):
+    """
+    Crée un graphique de répartition du chiffre d'affaires par catégorie pour
+    Streamlit, à partir des sessions ou d'une analyse par catégorie déjà calculée.
+    """
+    if analysis_category is None:
+        analysis_category = analyze_by_category(df)
     fig, ax = plt.subplots(figsize=(8, 8))
     revenues = analysis_category["Revenu"]
     plt.pie(revenues, labels=revenues.index, autopct='%1.1f%%', startangle=90)
@@ -408,7 +390,7 @@ def plot_objectives_chart(df):
     rects2 = ax.bar(x + width/2, objectives["RevenusObjectif"], width, label='Objectifs')
     
     ax.set_ylabel('Revenus (€)')
-    ax.set_title('Objectifs vs Réalisations par site')
+    ax.set_title('Objectifs prévisionnels vs Réalisations par site (3 derniers mois complets)')
     ax.set_xticks(x)
     ax.set_xticklabels(sites)
     ax.legend()
@@ -428,6 +410,18 @@ def plot_objectives_chart(df):
 # PARTIE 4: APPLICATION STREAMLIT
 # ============================================================
 
+def wait_for_live_updates(feed, seen_version, poll_interval=1.0):
+    """
+    Attend une nouvelle version des données du flux puis relance la page.
+    L'indicateur de la barre latérale est rafraîchi à chaque attente, ce qui
+    permet à Streamlit de traiter entre-temps les interactions de l'utilisateur.
+    """
+    status = st.sidebar.empty()
+    while True:
+        status.caption(f"Mode temps réel actif - version des données : {feed.version}")
+        if feed.wait_for_update(seen_version, timeout=poll_interval) > seen_version:
+            st.rerun()
+
 def main():
     # Titre et introduction
     st.title("📊 Tableau de bord - ECF BEQUET")
@@ -437,22 +431,56 @@ def main():
     st.sidebar.title("Navigation")
     page = st.sidebar.radio(
         "Sélectionnez une page",
-        ["Accueil", "Analyse par Formation", "Analyse par Site", "Satisfaction Client", "Rapport Complet"]
+        ["Accueil", "Analyse par Formation", "Analyse par Site", "Satisfaction Client", "Simulation", "Rapport Complet"]
     )
     
-    # Génération des données (une seule fois)
-    if 'df_sessions' not in st.session_state:
+    # Données partagées entre toutes les sessions (générées une seule fois par processus)
+    if 'dataset_lease' not in st.session_state:
         with st.spinner('Génération des données...'):
-            st.session_state.df_sessions = generate_training_data(n_sessions=100)
-            st.session_state.df_satisfaction = generate_satisfaction_data(st.session_state.df_sessions)
-    
-    df_sessions = st.session_state.df_sessions
-    df_satisfaction = st.session_state.df_satisfaction
+            key = registry.make_key("simulation", n_sessions=100)
+            st.session_state.dataset_lease = registry.lease(key, lambda: load_datasets(n_sessions=100))
+    
+    lease = st.session_state.dataset_lease
+    
+    # Mode temps réel : nouvelles sessions et réponses lues depuis un répertoire surveillé
+    st.sidebar.title("Temps réel")
+    feed = None
+    if st.sidebar.checkbox("Activer le mode temps réel", value=False):
+        feed = get_live_feed(lease)
+        seen_version = feed.version
+        for error in feed.recent_errors():
+            st.sidebar.warning(error)
+    
+    # Filtres propres à l'utilisateur, appliqués sur les données partagées
+    st.sidebar.title("Filtres")
+    all_sites = sorted(lease.data["sessions"]["Site"].unique())
+    selected_sites = st.sidebar.multiselect("Sites", options=all_sites, default=all_sites)
+    if set(selected_sites) == set(all_sites):
+        selected_sites = None
+    
+    if feed is None:
+        df_sessions = filter_view(registry, lease, "sessions", Site=selected_sites)
+        df_satisfaction = filter_view(registry, lease, "satisfaction", Site=selected_sites)
+        no_session = df_sessions.empty
+    elif page == "Accueil":
+        # La page d'accueil en temps réel se contente des agrégats du flux
+        df_sessions = df_satisfaction = None
+        no_session = feed.session_count(selected_sites) == 0
+    else:
+        df_sessions = feed.sessions(selected_sites)
+        df_satisfaction = feed.satisfaction(selected_sites)
+        no_session = df_sessions.empty
+    
+    if no_session:
+        st.warning("Aucune session ne correspond aux filtres sélectionnés.")
+        if feed is not None:
+            wait_for_live_updates(feed, seen_version)
+        return
     
     # Page d'accueil
     if page == "Accueil":
-        # Calcul des KPIs
-        kpis = calculate_kpis(df_sessions)
+        # Calcul des KPIs (en mode temps réel, à partir des agrégats mis à jour par le flux)
+        kpis = calculate_kpis(df_sessions) if feed is None else feed.kpis(selected_sites)
         
         # Affichage des KPIs dans des colonnes
         col1, col2, col3 = st.columns(3)
@@ -476,22 +504,38 @@ def main():
         
         with col1:
             st.markdown("#### Répartition du chiffre d'affaires par catégorie")
-            fig_revenue = plot_revenue_distribution_chart(df_sessions)
+            if feed is None:
+                fig_revenue = plot_revenue_distribution_chart(df_sessions)
+            else:
+                fig_revenue = plot_revenue_distribution_chart(analysis_category=feed.summary("Catégorie", selected_sites))
             st.pyplot(fig_revenue)
         
         with col2:
             st.markdown("#### Top 5 des formations les plus rentables")
-            fig_profit = plot_profitability_chart(df_sessions)
+            if feed is None:
+                fig_profit = plot_profitability_chart(df_sessions)
+            else:
+                fig_profit = plot_profitability_chart(rentabilite=feed.summary("Formation", selected_sites))
             st.pyplot(fig_profit)
         
         # Évolution mensuelle
         st.markdown("### Évolution mensuelle des performances")
-        fig_monthly = plot_monthly_trend_chart(df_sessions)
+        if feed is None:
+            fig_monthly = plot_monthly_trend_chart(df_sessions)
+        else:
+            fig_monthly = plot_monthly_trend_chart(performance_mensuelle=feed.summary("Mois", selected_sites))
         st.pyplot(fig_monthly)
         
         # Tableau de données (versions expansibles)
-        with st.expander("Voir les données brutes des sessions"):
-            st.dataframe(df_sessions)
+        if feed is None:
+            with st.expander("Voir les données brutes des sessions"):
+                st.dataframe(df_sessions)
+        else:
+            with st.expander("Voir les dernières sessions reçues"):
+                recent_sessions = feed.recent_sessions()
+                if selected_sites is not None:
+                    recent_sessions = recent_sessions[recent_sessions["Site"].isin(selected_sites)]
+                st.dataframe(recent_sessions)
     
     # Page d'analyse par formation
     elif page == "Analyse par Formation":
@@ -570,8 +614,11 @@ def main():
         
         # Graphique des objectifs vs réalisations
         st.markdown("### Objectifs vs réalisations par site")
-        fig_objectives = plot_objectives_chart(df_sessions)
-        st.pyplot(fig_objectives)
+        try:
+            fig_objectives = plot_objectives_chart(df_sessions)
+            st.pyplot(fig_objectives)
+        except ValueError:
+            st.info("Historique insuffisant pour établir des objectifs prévisionnels (au moins 4 mois complets sont nécessaires).")
         
         # Tableau détaillé par site
         st.markdown("### Performance détaillée par site")
@@ -684,6 +731,67 @@ def main():
             - **Durée des sessions** : Certaines formations pourraient bénéficier d'un ajustement de leur durée
             """)
 
+    # Page de simulation de scénarios
+    elif page == "Simulation":
+        st.markdown("## Simulation de scénarios (Monte-Carlo)")
+        st.markdown("Simulez une année de sessions en modifiant les prix, les coûts ou la capacité de certaines formations.")
+        
+        formations = sorted(df_sessions["Formation"].unique())
+        selected_formations = st.multiselect("Formations concernées par le scénario", options=formations)
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            price_change = st.slider("Variation des prix (%)", min_value=-30, max_value=30, value=0, step=1)
+        with col2:
+            cost_change = st.slider("Variation des coûts (%)", min_value=-30, max_value=30, value=0, step=1)
+        with col3:
+            capacity_change = st.slider("Variation de la capacité (%)", min_value=-50, max_value=50, value=0, step=5)
+        with col4:
+            price_elasticity = st.number_input("Élasticité-prix de la demande", min_value=-3.0, max_value=0.0, value=0.0, step=0.1)
+        
+        n_replicas = st.select_slider("Nombre de simulations", options=[500, 1000, 2000, 5000, 10000], value=2000)
+        
+        with st.spinner('Simulation en cours...'):
+            baseline = run_monte_carlo(df_sessions, n_replicas=n_replicas, seed=42)
+            scenario = run_monte_carlo(
+                df_sessions,
+                n_replicas=n_replicas,
+                price_factors={f: 1 + price_change / 100 for f in selected_formations},
+                cost_factors={f: 1 + cost_change / 100 for f in selected_formations},
+                capacity_factors={f: 1 + capacity_change / 100 for f in selected_formations},
+                price_elasticity=price_elasticity,
+                seed=42
+            )
+        
+        # Distribution du bénéfice total annuel
+        st.markdown("### Distribution du bénéfice annuel total")
+        baseline_total = baseline.groupby("Réplique")["Bénéfice"].sum()
+        scenario_total = scenario.groupby("Réplique")["Bénéfice"].sum()
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Bénéfice médian (scénario)", f"{scenario_total.median():,.2f} €",
+                      delta=f"{scenario_total.median() - baseline_total.median():,.2f} €")
+        with col2:
+            st.metric("Bénéfice au pire 5 % (scénario)", f"{scenario_total.quantile(0.05):,.2f} €",
+                      delta=f"{scenario_total.quantile(0.05) - baseline_total.quantile(0.05):,.2f} €")
+        
+        fig, ax = plt.subplots(figsize=(10, 5))
+        ax.hist(baseline_total, bins=50, alpha=0.5, label="Situation actuelle")
+        ax.hist(scenario_total, bins=50, alpha=0.5, label="Scénario")
+        ax.set_xlabel("Bénéfice annuel (€)")
+        ax.set_ylabel("Nombre de simulations")
+        ax.legend()
+        plt.tight_layout()
+        st.pyplot(fig)
+        
+        # Distributions par formation et par site
+        st.markdown("### Bénéfice et marge nette simulés par formation")
+        st.dataframe(summarize_simulation(scenario, by="Formation"))
+        
+        st.markdown("### Bénéfice et marge nette simulés par site")
+        st.dataframe(summarize_simulation(scenario, by="Site"))
+
         # Page de rapport complet
     elif page == "Rapport Complet":
         st.markdown("## Rapport de synthèse pour la direction")
@@ -745,8 +853,11 @@ def main():
         
         # Objectifs vs réalisations
         st.markdown("### Objectifs vs réalisations")
-        objectives = analyze_objectives_vs_actuals(df_sessions)
-        st.dataframe(objectives)
+        try:
+            objectives = analyze_objectives_vs_actuals(df_sessions)
+            st.dataframe(objectives)
+        except ValueError:
+            st.info("Historique insuffisant pour établir des objectifs prévisionnels (au moins 4 mois complets sont nécessaires).")
         
         # Recommandations stratégiques
         st.markdown("### Recommandations stratégiques")
@@ -772,6 +883,30 @@ def main():
         7. **Développer des modules complémentaires** pour les formations à haute satisfaction
         """)
         
+        # Plan de sessions proposé pour le trimestre suivant
+        st.markdown("### Plan de sessions proposé pour le prochain trimestre")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            rooms_per_site = st.number_input("Salles disponibles par site", min_value=1, value=2)
+        with col2:
+            trainers_per_category = st.number_input("Formateurs disponibles par catégorie", min_value=1, value=2)
+        with col3:
+            growth = st.slider("Évolution de la demande (%)", min_value=-50, max_value=100, value=0, step=5)
+        
+        planning_inputs = estimate_planning_inputs(df_sessions, growth=1 + growth / 100)
+        session_plan = optimize_session_plan(
+            planning_inputs,
+            rooms_per_site=rooms_per_site,
+            trainers_per_category=trainers_per_category
+        )
+        
+        if not session_plan.empty:
+            st.metric("Bénéfice prévu du plan", f"{session_plan['BénéficePrévu'].sum():,.2f} €")
+            st.dataframe(session_plan)
+        else:
+            st.info("Aucune session rentable ne peut être planifiée avec ces paramètres.")
+        
         # Export options
         st.markdown("### Export des données")
         
@@ -791,6 +926,10 @@ def main():
         
         with col3:
             st.markdown(get_csv_download_link(analyze_profitability_by_training(df_sessions), "rentabilite_formations"), unsafe_allow_html=True)
+    
+    # En mode temps réel, la page est réaffichée dès que le flux reçoit de nouvelles données
+    if feed is not None:
+        wait_for_live_updates(feed, seen_version)
 
     
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+"""
+Catalogue de référence des formations, catégories, sites, coûts et prix.
+
+Le catalogue est chargé depuis un fichier JSON versionné (data/catalogue.json).
+Chaque formation, catégorie et site reçoit un code entier (sa position dans le
+fichier) : les enrichissements (catégorie, coût, prix) se font par indexation
+de tableaux NumPy, et les colonnes Formation / Catégorie / Site des DataFrames
+sont des `Categorical` partageant ces mêmes codes.
+"""
+
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalogue.json")
+SUPPORTED_VERSIONS = {1}
+
+
+class Catalog:
+    """Tables de référence indexées par code entier."""
+
+    def __init__(self, version, formations, sites):
+        self.version = version
+        self.formations = pd.Index([f["nom"] for f in formations], name="Formation")
+        self.sites = pd.Index(sites, name="Site")
+        self.categories = pd.Index(pd.unique(pd.Series([f["catégorie"] for f in formations])), name="Catégorie")
+
+        # Tables de correspondance : code formation → valeur
+        self.formation_category = self.categories.get_indexer([f["catégorie"] for f in formations])
+        self.cost = np.array([f["coût"] for f in formations])
+        self.price = np.array([f["prix"] for f in formations])
+
+        self.formation_dtype = pd.CategoricalDtype(self.formations)
+        self.category_dtype = pd.CategoricalDtype(self.categories)
+        self.site_dtype = pd.CategoricalDtype(self.sites)
+
+    def formation_codes(self, values):
+        """Convertit des noms de formation (ou une colonne catégorielle) en codes entiers."""
+        return self._codes(values, self.formations, self.formation_dtype)
+
+    def site_codes(self, values):
+        """Convertit des noms de site (ou une colonne catégorielle) en codes entiers."""
+        return self._codes(values, self.sites, self.site_dtype)
+
+    def formation_column(self, codes):
+        """Construit une colonne Formation catégorielle à partir de codes."""
+        return pd.Categorical.from_codes(codes, dtype=self.formation_dtype)
+
+    def category_column(self, formation_codes):
+        """Construit la colonne Catégorie à partir des codes de formation."""
+        return pd.Categorical.from_codes(self.formation_category[formation_codes], dtype=self.category_dtype)
+
+    def site_column(self, codes):
+        """Construit une colonne Site catégorielle à partir de codes."""
+        return pd.Categorical.from_codes(codes, dtype=self.site_dtype)
+
+    def to_categorical(self, df):
+        """
+        Convertit les colonnes Formation et Site d'un DataFrame aux types
+        catégoriels du catalogue (et Catégorie si elle est présente).
+        Les valeurs inconnues du catalogue lèvent une `ValueError`.
+        """
+        df = df.copy()
+        formation_codes = self.formation_codes(df["Formation"])
+        df["Formation"] = self.formation_column(formation_codes)
+        if "Catégorie" in df.columns:
+            df["Catégorie"] = self.category_column(formation_codes)
+        df["Site"] = self.site_column(self.site_codes(df["Site"]))
+        return df
+
+    @staticmethod
+    def _codes(values, index, dtype):
+        if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype) and values.dtype == dtype:
+            return np.asarray(values.cat.codes if isinstance(values, pd.Series) else values.codes)
+        codes = index.get_indexer(values)
+        if (codes < 0).any():
+            unknown = sorted(set(np.asarray(values)[codes < 0]))
+            raise ValueError(f"Valeurs de {index.name} absentes du catalogue : {unknown}")
+        return codes
+
+
+def load_catalog(path=CATALOG_PATH):
+    """Charge le catalogue de référence (mis en cache par chemin)."""
+    return _load_catalog(os.path.abspath(path))
+
+
+@lru_cache(maxsize=None)
+def _load_catalog(path):
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    if raw.get("version") not in SUPPORTED_VERSIONS:
+        raise ValueError(f"Version de catalogue non prise en charge : {raw.get('version')}")
+    return Catalog(raw["version"], raw["formations"], raw["sites"])
@@ -0,0 +1,185 @@
+"""
+Registre de jeux de données partagé entre les sessions Streamlit.
+
+Streamlit ré-exécute app.py à chaque interaction, mais les modules importés
+restent chargés pour toute la durée du processus : ce module porte donc un
+registre unique qui conserve une seule copie de chaque jeu de données, quel
+que soit le nombre de responsables connectés.
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+
+# Chaque session reçoit des copies superficielles des DataFrames partagés.
+# Avec le copy-on-write de pandas (toujours actif à partir de pandas 3.0),
+# toute modification d'une telle copie duplique les colonnes concernées au
+# lieu d'écrire dans les données partagées.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+# ============================================================
+# REGISTRE DES JEUX DE DONNÉES
+# ============================================================
+
+class DatasetRegistry:
+    """
+    Cache de jeux de données partagés, indexé par identité
+    (nom de la source + paramètres de génération).
+
+    Chaque entrée compte ses références. Une entrée qui n'est plus référencée
+    par aucune session reste en cache et n'est évincée (de la moins récemment
+    utilisée à la plus récente) que lorsque le nombre d'entrées dépasse
+    `max_entries`.
+    """
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(name, **params):
+        """Construit la clé d'identité d'un jeu de données."""
+        return (name,) + tuple(sorted(params.items()))
+
+    def acquire(self, key, factory):
+        """
+        Retourne les données associées à `key` en incrémentant leur compteur
+        de références. `factory` n'est appelée qu'une seule fois par clé, même
+        si plusieurs sessions la demandent simultanément ; la génération se
+        fait hors du verrou du registre, les autres sessions demandant la même
+        clé attendent son résultat sans bloquer le reste du registre.
+
+        Les DataFrames retournés sont des copies superficielles (sans
+        duplication des données) propres à l'appelant.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            creator = entry is None
+            if creator:
+                entry = {"future": Future(), "refs": 0, "indices": {}}
+                self._entries[key] = entry
+            entry["refs"] += 1
+            self._entries.move_to_end(key)
+
+        if creator:
+            try:
+                entry["future"].set_result(factory())
+            except BaseException as e:
+                entry["future"].set_exception(e)
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+                raise
+
+        data = entry["future"].result()
+        with self._lock:
+            self._evict()
+        return {name: frame.copy(deep=False) for name, frame in data.items()}
+
+    def release(self, key):
+        """Décrémente le compteur de références d'une entrée."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["refs"] > 0:
+                entry["refs"] -= 1
+            self._evict()
+
+    def lease(self, key, factory):
+        """
+        Acquiert une entrée et retourne un bail (`DatasetLease`) qui la libère
+        automatiquement lorsque la session qui le détient disparaît.
+        """
+        return DatasetLease(self, key, self.acquire(key, factory))
+
+    def group_indices(self, key, frame_name, column):
+        """
+        Retourne, pour une colonne d'un des DataFrames de l'entrée, les
+        positions des lignes de chaque valeur. Le calcul est fait une seule
+        fois par entrée et partagé par toutes les sessions.
+        """
+        cache_key = (frame_name, column)
+        with self._lock:
+            entry = self._entries[key]
+            indices = entry["indices"].get(cache_key)
+        if indices is None:
+            frame = entry["future"].result()[frame_name]
+            indices = frame.groupby(column, observed=True).indices
+            with self._lock:
+                indices = entry["indices"].setdefault(cache_key, indices)
+        return indices
+
+    def stats(self):
+        """Retourne le nombre de références de chaque entrée en cache."""
+        with self._lock:
+            return {key: entry["refs"] for key, entry in self._entries.items()}
+
+    def _evict(self):
+        """Évince les entrées non référencées au-delà de `max_entries`."""
+        excess = len(self._entries) - self.max_entries
+        for key in list(self._entries):
+            if excess <= 0:
+                break
+            if self._entries[key]["refs"] == 0:
+                del self._entries[key]
+                excess -= 1
+
+
+class DatasetLease:
+    """
+    Référence détenue par une session sur une entrée du registre.
+
+    Stocké dans `st.session_state`, le bail est collecté avec l'état de la
+    session, ce qui libère la référence sans dépendre d'un événement de
+    fermeture que Streamlit n'expose pas.
+    """
+
+    def __init__(self, registry, key, data):
+        self.registry = registry
+        self.key = key
+        self.data = data
+        self._finalizer = weakref.finalize(self, registry.release, key)
+
+    def release(self):
+        """Libère explicitement la référence (idempotent)."""
+        self._finalizer()
+
+
+# ============================================================
+# FILTRES PAR UTILISATEUR
+# ============================================================
+
+def filter_view(registry, lease, frame_name, **filters):
+    """
+    Applique des filtres d'égalité (ex. `Site=["Auneau"]`) sur un DataFrame
+    partagé, à partir des positions précalculées par le registre : aucun
+    masque n'est recalculé sur l'ensemble des lignes.
+
+    Un filtre à `None` est ignoré ; une liste vide ne retient aucune ligne.
+    Sans filtre actif, le DataFrame de la session est retourné tel quel.
+    """
+    frame = lease.data[frame_name]
+    positions = None
+
+    for column, values in filters.items():
+        if values is None:
+            continue
+        indices = registry.group_indices(lease.key, frame_name, column)
+        selected = [indices[v] for v in values if v in indices]
+        column_positions = np.sort(np.concatenate(selected)) if selected else np.array([], dtype=np.intp)
+        positions = column_positions if positions is None else np.intersect1d(positions, column_positions)
+
+    if positions is None:
+        return frame
+    return frame.take(positions)
+
+
+# Registre unique du processus
+registry = DatasetRegistry()
@@ -0,0 +1,241 @@
+"""
+Prévision de la demande mensuelle (inscriptions et revenus) par Site × Formation.
+
+Toutes les séries sont ajustées en une seule résolution matricielle : elles
+partagent le même calendrier mensuel, donc la même matrice de régression
+(niveau, tendance linéaire et saisonnalité annuelle en harmoniques de
+Fourier). Le modèle ne conserve que ses statistiques suffisantes (X'X et
+X'Y), ce qui permet d'intégrer de nouvelles données sans tout réajuster.
+
+La tendance et la saisonnalité ne sont retenues que si l'historique est
+assez long pour les estimer (cf. `select_forecast_bank`) ; en deçà, le
+modèle se réduit au niveau moyen de chaque série.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+METRICS = ["Inscrits", "Revenu"]
+SERIES_KEYS = ["Site", "Formation"]
+
+# Nombre minimal de mois d'apprentissage pour estimer chaque composante
+TREND_MIN_MONTHS = 18
+SEASONAL_MIN_MONTHS = 24
+
+
+# ============================================================
+# PRÉPARATION DES SÉRIES
+# ============================================================
+
+def build_monthly_panel(df, metrics=METRICS, complete_months_only=False):
+    """
+    Agrège les sessions en un tableau mois × séries, une colonne par
+    (métrique, site, formation). Les mois sans session valent 0.
+
+    Avec `complete_months_only`, le premier et le dernier mois sont écartés
+    s'ils ne sont que partiellement couverts : la couverture est déduite de
+    la première et de la dernière session (mois entamé après le 1er, ou
+    clos avant son dernier jour).
+    """
+    months = df["Date"].dt.to_period("M")
+    panel = df.groupby([months] + SERIES_KEYS, observed=True)[metrics].sum().unstack(SERIES_KEYS, fill_value=0)
+    panel.index.name = "Mois"
+    if len(panel):
+        first, last = panel.index.min(), panel.index.max()
+        if complete_months_only:
+            if df["Date"].min().normalize() > first.start_time:
+                first += 1
+            if not df["Date"].max().is_month_end:
+                last -= 1
+        full_range = pd.period_range(first, last, freq="M")
+        panel = panel.reindex(full_range, fill_value=0)
+    return panel.astype(float)
+
+
+def _design(t, harmonics, trend=True):
+    """Matrice de régression : constante, tendance (optionnelle) et harmoniques de période 12."""
+    t = np.asarray(t, dtype=float)
+    columns = [np.ones_like(t)]
+    if trend:
+        columns.append(t)
+    for k in range(1, harmonics + 1):
+        angle = 2 * np.pi * k * t / 12
+        columns += [np.sin(angle), np.cos(angle)]
+    return np.column_stack(columns)
+
+
+# ============================================================
+# BANQUE DE MODÈLES
+# ============================================================
+
+class ForecastBank:
+    """
+    Ensemble de modèles saisonniers, un par série, ajustés simultanément
+    par moindres carrés régularisés (ridge sur tous les termes hors constante).
+    Avec `harmonics=0` et `trend=False`, chaque prévision est la moyenne
+    historique de la série.
+    """
+
+    def __init__(self, harmonics=2, ridge=1.0, trend=True):
+        self.harmonics = harmonics
+        self.ridge = ridge
+        self.trend = trend
+        self.origin = None
+        self.last_month = None
+        self.columns = pd.MultiIndex.from_tuples([], names=[None] + SERIES_KEYS)
+        self._xtx = None
+        self._xty = None
+        self._coefficients = None
+
+    def fit(self, panel):
+        """Ajuste toutes les séries sur un tableau produit par `build_monthly_panel`."""
+        self.origin = panel.index.min()
+        self.last_month = panel.index.max()
+        self.columns = panel.columns
+        x = _design(self._month_index(panel.index), self.harmonics, self.trend)
+        self._xtx = x.T @ x
+        self._xty = x.T @ panel.to_numpy()
+        self._coefficients = None
+        return self
+
+    def update(self, panel):
+        """
+        Intègre de nouvelles observations (tableau de même forme, en général
+        restreint aux mois concernés par les nouvelles sessions).
+
+        Les valeurs sont additionnées à celles déjà vues : un mois déjà connu
+        est complété, un mois nouveau ajoute une ligne au calendrier, et les
+        mois intermédiaires sans données comptent pour 0. Le coût est
+        proportionnel au nombre de mois et de séries touchés, pas à
+        l'historique.
+
+        Destinée aux réentraînements incrémentaux (par exemple un traitement
+        de nuit qui conserve la banque entre deux exécutions) ; le tableau de
+        bord ne l'utilise pas : ses objectifs sont un backtest sur une
+        fenêtre glissante, réajusté à chaque affichage pour le coût d'une
+        seule résolution d'un petit système linéaire.
+        """
+        if self.origin is None:
+            return self.fit(panel)
+        if panel.index.min() < self.origin:
+            raise ValueError("Les nouvelles données précèdent le début de l'historique du modèle.")
+
+        # Nouvelles séries : historique implicitement nul
+        new_columns = panel.columns.difference(self.columns, sort=False)
+        if len(new_columns):
+            self.columns = self.columns.append(new_columns)
+            self._xty = np.hstack([self._xty, np.zeros((self._xty.shape[0], len(new_columns)))])
+
+        # Nouveaux mois : la ligne du calendrier s'ajoute pour toutes les séries
+        if panel.index.max() > self.last_month:
+            new_months = pd.period_range(self.last_month + 1, panel.index.max(), freq="M")
+            x_new = _design(self._month_index(new_months), self.harmonics, self.trend)
+            self._xtx += x_new.T @ x_new
+            self.last_month = panel.index.max()
+
+        x = _design(self._month_index(panel.index), self.harmonics, self.trend)
+        positions = self.columns.get_indexer(panel.columns)
+        self._xty[:, positions] += x.T @ panel.to_numpy()
+        self._coefficients = None
+        return self
+
+    def predict(self, horizon=3, start=None, clip=True):
+        """
+        Prévoit `horizon` mois à partir de `start` (par défaut le mois qui
+        suit le dernier mois observé). Avec `clip`, les prévisions négatives
+        sont ramenées à 0 ; sans, elles sont conservées pour être agrégées
+        avant d'être bornées (sinon l'écrêtage série par série biaise les
+        totaux vers le haut).
+        """
+        start = self.last_month + 1 if start is None else start
+        months = pd.period_range(start, periods=horizon, freq="M")
+        x = _design(self._month_index(months), self.harmonics, self.trend)
+        forecast = x @ self.coefficients
+        if clip:
+            forecast = np.clip(forecast, 0, None)
+        return pd.DataFrame(forecast, index=pd.PeriodIndex(months, name="Mois"), columns=self.columns)
+
+    @property
+    def coefficients(self):
+        """Coefficients de toutes les séries (une colonne par série)."""
+        if self._coefficients is None:
+            penalty = np.eye(self._xtx.shape[0]) * self.ridge
+            penalty[0, 0] = 0
+            self._coefficients = np.linalg.solve(self._xtx + penalty, self._xty)
+        return self._coefficients
+
+    def _month_index(self, months):
+        """Nombre de mois écoulés depuis l'origine du modèle."""
+        return np.array([(month - self.origin).n for month in months])
+
+
+def select_forecast_bank(n_months, ridge=1.0):
+    """
+    Choisit le modèle adapté à `n_months` mois d'apprentissage : la
+    saisonnalité à partir de `SEASONAL_MIN_MONTHS` (deux cycles annuels),
+    la tendance à partir de `TREND_MIN_MONTHS`, sinon le seul niveau moyen.
+    """
+    return ForecastBank(
+        harmonics=2 if n_months >= SEASONAL_MIN_MONTHS else 0,
+        ridge=ridge,
+        trend=n_months >= TREND_MIN_MONTHS
+    )
+
+
+# ============================================================
+# OBJECTIFS FONDÉS SUR LES PRÉVISIONS
+# ============================================================
+
+def _split_panel(df, horizon):
+    """Sépare les mois complets en apprentissage et période d'évaluation."""
+    panel = build_monthly_panel(df, complete_months_only=True)
+    train, actual = panel.iloc[:-horizon], panel.iloc[-horizon:]
+    if train.empty:
+        raise ValueError("Historique insuffisant pour établir des objectifs prévisionnels.")
+    return train, actual
+
+
+def _site_totals(panel):
+    """Totaux de la période par site et par métrique."""
+    return panel.sum().unstack(0).groupby("Site", observed=True).sum()
+
+
+def forecast_objectives(df, horizon=3, bank=None):
+    """
+    Calcule des objectifs par site pour les `horizon` derniers mois complets :
+    les modèles sont ajustés sur les mois complets précédents, et leurs
+    prévisions pour la période servent d'objectifs face aux réalisations
+    observées. Sans `bank`, le modèle est choisi selon la longueur de
+    l'historique (`select_forecast_bank`). Lève une `ValueError` si
+    l'historique ne compte pas plus de `horizon` mois complets.
+    """
+    train, actual = _split_panel(df, horizon)
+
+    bank = (bank or select_forecast_bank(len(train))).fit(train)
+    forecast = bank.predict(horizon=len(actual), start=actual.index.min(), clip=False)
+
+    objectives = _site_totals(forecast).clip(lower=0)
+    actuals = _site_totals(actual)
+    return objectives, actuals
+
+
+def backtest_objectives(df, horizon=3, bank=None):
+    """
+    Contrôle la qualité des objectifs : compare, par site et par métrique,
+    l'erreur absolue relative (en % des réalisations) des objectifs
+    prévisionnels à celle d'objectifs fondés sur la moyenne mensuelle
+    historique. Les objectifs ne devraient pas faire moins bien que cette
+    référence (colonne `Validé`).
+    """
+    train, actual = _split_panel(df, horizon)
+    objectives, actuals = forecast_objectives(df, horizon=horizon, bank=bank)
+    baseline = _site_totals(train.mean().to_frame().T * len(actual))
+
+    actuals = actuals.stack()
+    model_error = ((objectives.stack() - actuals).abs() / actuals * 100).round(1)
+    baseline_error = ((baseline.stack() - actuals).abs() / actuals * 100).round(1)
+    result = pd.DataFrame({"ErreurModèle": model_error, "ErreurMoyenne": baseline_error})
+    result.index.names = ["Site", "Métrique"]
+    result["Validé"] = result["ErreurModèle"] <= result["ErreurMoyenne"]
+    return result
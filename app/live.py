@@ -0,0 +1,407 @@
+"""
+Flux de modifications et mode « temps réel » du tableau de bord.
+
+Les nouvelles sessions et réponses aux questionnaires arrivent soit par une
+file locale (`LiveFeed.submit_sessions` / `LiveFeed.submit_satisfaction`),
+soit sous forme de fichiers CSV déposés dans le répertoire surveillé :
+- sessions_*.csv : Formation, Date, Site, Capacité, Inscrits, Présents,
+  Satisfaction, et éventuellement Coût / PrixVente (sinon valeurs du catalogue) ;
+- satisfaction_*.csv : mêmes colonnes que les données de satisfaction.
+
+Les fichiers doivent être déposés de façon atomique (écriture sous un autre
+nom, par exemple `.csv.tmp`, puis renommage) afin de ne jamais être lus en
+cours d'écriture. Le répertoire surveillé relève de la configuration du
+serveur (variable d'environnement ECF_LIVE_WATCH_DIR) et non des utilisateurs.
+
+Chaque lot est ajouté aux données sans recopier l'historique, et seuls les
+agrégats (Site × Mois) qu'il touche sont recalculés.
+"""
+
+import glob
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from catalog import load_catalog
+
+
+# Répertoire surveillé, fixé par la configuration du serveur
+WATCH_DIR = os.environ.get(
+    "ECF_LIVE_WATCH_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "flux")
+)
+
+# Colonnes additives conservées par (Site, Mois, Formation) ; les moyennes s'en déduisent
+SUM_COLUMNS = ["Revenu", "Bénéfice", "Inscrits", "Présents", "Capacité",
+               "MargeNette", "TauxRemplissage", "TauxPrésence", "Satisfaction"]
+MEAN_COLUMNS = ["MargeNette", "TauxRemplissage", "TauxPrésence", "Satisfaction"]
+NUMERIC_COLUMNS = ["Capacité", "Inscrits", "Présents", "Satisfaction"]
+SCORE_COLUMNS = ["ContenuFormation", "QualitéFormateur", "SupportsPédagogiques",
+                 "EnvironnementFormation", "PertinencePratique", "SatisfactionGlobale"]
+
+
+# ============================================================
+# PRÉPARATION DES LOTS
+# ============================================================
+
+def _numeric_columns(raw, columns):
+    """
+    Convertit des colonnes d'un lot brut en tableaux numériques. Lève une
+    `ValueError` si une colonne manque, n'est pas convertible ou contient
+    une valeur manquante.
+    """
+    missing = [column for column in columns if column not in raw]
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {missing}")
+    numeric = {column: pd.to_numeric(raw[column]).to_numpy() for column in columns}
+    incomplete = [column for column, values in numeric.items() if pd.isna(values).any()]
+    if incomplete:
+        raise ValueError(f"Valeurs manquantes dans : {incomplete}")
+    return numeric
+
+
+def _dates(raw):
+    """Convertit la colonne Date d'un lot brut ; lève une `ValueError` si une date manque."""
+    dates = pd.to_datetime(raw["Date"]).to_numpy()
+    if pd.isna(dates).any():
+        raise ValueError("Date manquante")
+    return dates
+
+
+def prepare_session_delta(raw, catalog=None):
+    """
+    Valide et complète un lot de sessions brutes : types catégoriels du
+    catalogue, catégorie, coût et prix par défaut, et indicateurs dérivés
+    calculés comme dans `generate_training_data`.
+
+    Lève une `ValueError` si une colonne numérique ou la date manque ou
+    n'est pas convertible, si une capacité est nulle ou négative, ou si des
+    inscrits / présents sont négatifs.
+    """
+    catalog = catalog or load_catalog()
+    formation_codes = catalog.formation_codes(raw["Formation"])
+    n = len(raw)
+
+    numeric = _numeric_columns(raw, NUMERIC_COLUMNS + [column for column in ("Coût", "PrixVente") if column in raw])
+    capacity, registrations, attendance = numeric["Capacité"], numeric["Inscrits"], numeric["Présents"]
+    if (capacity <= 0).any():
+        raise ValueError("Capacité nulle ou négative")
+    if (registrations < 0).any() or (attendance < 0).any():
+        raise ValueError("Inscrits ou présents négatifs")
+
+    cost = numeric["Coût"] if "Coût" in numeric else catalog.cost[formation_codes]
+    price = numeric["PrixVente"] if "PrixVente" in numeric else catalog.price[formation_codes]
+    revenue = attendance * price
+    profit = revenue - cost
+
+    return pd.DataFrame({
+        "Formation": catalog.formation_column(formation_codes),
+        "Catégorie": catalog.category_column(formation_codes),
+        "Date": _dates(raw),
+        "Site": catalog.site_column(catalog.site_codes(raw["Site"])),
+        "Capacité": capacity,
+        "Inscrits": registrations,
+        "Présents": attendance,
+        "TauxRemplissage": np.round(registrations / capacity * 100, 1),
+        "TauxPrésence": np.round(np.divide(attendance * 100, registrations, out=np.zeros(n), where=registrations > 0), 1),
+        "Coût": cost,
+        "PrixVente": price,
+        "Revenu": revenue,
+        "Bénéfice": profit,
+        "MargeNette": np.round(np.divide(profit * 100, revenue, out=np.zeros(n), where=revenue > 0), 1),
+        "Satisfaction": numeric["Satisfaction"]
+    })
+
+
+def aggregate_sessions(df):
+    """
+    Sommes et nombre de sessions par (Site, Mois), sous forme de dictionnaire
+    {(site, mois): DataFrame indexé par Formation}.
+    """
+    months = df["Date"].dt.to_period("M").rename("Mois")
+    keys = ["Site", months, "Formation"]
+    aggregates = df.groupby(keys, observed=True)[SUM_COLUMNS].sum()
+    aggregates["Sessions"] = df.groupby(keys, observed=True).size()
+    aggregates = aggregates.astype(float)
+    return {
+        key: cell.droplevel(["Site", "Mois"])
+        for key, cell in aggregates.groupby(level=["Site", "Mois"], observed=True)
+    }
+
+
+# ============================================================
+# FLUX EN DIRECT
+# ============================================================
+
+class LiveFeed:
+    """
+    Données de sessions et de satisfaction alimentées en continu.
+
+    L'historique initial (partagé, en lecture seule) n'est jamais recopié :
+    les lots reçus sont conservés à part. Les agrégats sont tenus par
+    (Site, Mois) ; un lot ne met à jour que les cellules qu'il touche, et
+    les KPIs, évolutions mensuelles et synthèses par site, formation ou
+    catégorie s'en déduisent sans relire les sessions. Les DataFrames
+    complets ne sont reconstitués que pour les pages qui ont besoin des lignes.
+    """
+
+    def __init__(self, sessions, satisfaction, watch_dir=None, catalog=None):
+        self.catalog = catalog or load_catalog()
+        self.watch_dir = watch_dir
+        self.version = 0
+        self.errors = deque(maxlen=20)
+
+        self._chunks = {"sessions": [sessions], "satisfaction": [satisfaction]}
+        self._frames = {}
+        self._positions = {name: [self._site_positions(chunks[0], 0)] for name, chunks in self._chunks.items()}
+        self._rows = {name: len(chunks[0]) for name, chunks in self._chunks.items()}
+        self._cells = aggregate_sessions(sessions)
+        self._cell_totals = {}
+        self._processed_files = set()
+        self._failed_files = {}
+        self._queue = queue.Queue()
+        self._lock = threading.RLock()
+        self._updated = threading.Condition(self._lock)
+        self._thread = None
+
+    # --- Réception des lots ---
+
+    def submit_sessions(self, raw):
+        """Dépose un lot de nouvelles sessions dans la file locale."""
+        self._queue.put(("sessions", raw, False))
+
+    def submit_satisfaction(self, raw):
+        """Dépose un lot de nouvelles réponses de satisfaction dans la file locale."""
+        self._queue.put(("satisfaction", raw, False))
+
+    def scan_directory(self):
+        """
+        Met en file les fichiers CSV du répertoire surveillé non encore lus,
+        lus et validés en une seule étape. Un fichier illisible ou invalide
+        est signalé une fois puis relu seulement s'il est modifié ; un fichier
+        n'est marqué comme traité qu'une fois chargé et validé.
+        """
+        if not self.watch_dir:
+            return
+        for kind in ("sessions", "satisfaction"):
+            for path in sorted(glob.glob(os.path.join(self.watch_dir, f"{kind}_*.csv"))):
+                if path in self._processed_files:
+                    continue
+                try:
+                    stat = os.stat(path)
+                    signature = (stat.st_mtime, stat.st_size)
+                    if self._failed_files.get(path) == signature:
+                        continue
+                    prepared = self._prepare(kind, pd.read_csv(path))
+                except FileNotFoundError:
+                    continue
+                except Exception as e:
+                    self._failed_files[path] = signature
+                    with self._lock:
+                        self.errors.append(f"Fichier {os.path.basename(path)} rejeté : {e}")
+                    continue
+                self._failed_files.pop(path, None)
+                self._processed_files.add(path)
+                self._queue.put((kind, prepared, True))
+
+    def apply_pending(self):
+        """
+        Intègre tous les lots en attente et retourne l'ensemble des clés
+        (Site, Mois) dont les agrégats ont changé. Un lot invalide est écarté
+        et signalé dans `errors` sans interrompre le flux.
+        """
+        touched = set()
+        while True:
+            try:
+                kind, batch, prepared = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            try:
+                delta, delta_cells = batch if prepared else self._prepare(kind, batch)
+            except Exception as e:
+                with self._lock:
+                    self.errors.append(f"Lot {kind} ignoré : {e}")
+                continue
+
+            with self._lock:
+                for key, cell in delta_cells.items():
+                    self._cells[key] = cell if key not in self._cells else self._cells[key].add(cell, fill_value=0)
+                    self._cell_totals.pop(key, None)
+                touched.update(delta_cells)
+
+                self._positions[kind].append(self._site_positions(delta, self._rows[kind]))
+                self._rows[kind] += len(delta)
+                self._chunks[kind].append(delta)
+
+                self.version += 1
+                self._updated.notify_all()
+
+        return touched
+
+    # --- Lecture des agrégats ---
+
+    def kpis(self, sites=None):
+        """
+        KPIs principaux (mêmes clés que `calculate_kpis`) calculés à partir
+        des totaux par (Site, Mois) ; seuls ceux touchés par un lot depuis
+        la dernière lecture sont recalculés.
+        """
+        with self._lock:
+            totals = sum(
+                (self._totals(key) for key in self._cells if sites is None or key[0] in sites),
+                pd.Series(0.0, index=SUM_COLUMNS + ["Sessions"])
+            )
+
+        sessions = totals["Sessions"] or np.nan
+        return {
+            "Chiffre d'affaires total": totals["Revenu"],
+            "Bénéfice total": totals["Bénéfice"],
+            "Marge nette moyenne": totals["MargeNette"] / sessions,
+            "Nombre total d'inscrits": int(totals["Inscrits"]),
+            "Taux de remplissage moyen": totals["TauxRemplissage"] / sessions,
+            "Taux de présence moyen": totals["TauxPrésence"] / sessions,
+            "Satisfaction client moyenne": totals["Satisfaction"] / sessions
+        }
+
+    def session_count(self, sites=None):
+        """Nombre de sessions (éventuellement restreint à `sites`), tiré des agrégats."""
+        with self._lock:
+            return int(sum(self._totals(key)["Sessions"] for key in self._cells if sites is None or key[0] in sites))
+
+    def summary(self, by, sites=None):
+        """
+        Synthèse par "Site", "Mois", "Formation" ou "Catégorie" tirée des
+        agrégats, avec les colonnes des fonctions d'analyse correspondantes
+        (sommes, et moyennes par session pour les taux, marges et satisfaction).
+        """
+        with self._lock:
+            cells = [
+                cell.assign(Site=key[0], Mois=key[1].strftime("%Y-%m"))
+                for key, cell in self._cells.items() if sites is None or key[0] in sites
+            ]
+        table = pd.concat(cells).rename_axis("Formation").reset_index()
+        if by == "Catégorie":
+            table["Catégorie"] = self.catalog.category_column(self.catalog.formation_codes(table["Formation"]))
+
+        summary = table.groupby(by, observed=True)[SUM_COLUMNS + ["Sessions"]].sum()
+        summary[MEAN_COLUMNS] = summary[MEAN_COLUMNS].div(summary["Sessions"], axis=0)
+        return summary.drop(columns="Sessions")
+
+    # --- Lecture des lignes ---
+
+    def sessions(self, sites=None):
+        """Sessions (éventuellement restreintes à `sites`), reconstituées au plus une fois par version."""
+        return self._view("sessions", sites)
+
+    def satisfaction(self, sites=None):
+        """Réponses de satisfaction (éventuellement restreintes à `sites`)."""
+        return self._view("satisfaction", sites)
+
+    def recent_sessions(self, n=100):
+        """Les `n` dernières sessions reçues, sans reconstituer l'historique."""
+        with self._lock:
+            chunks = []
+            for chunk in reversed(self._chunks["sessions"]):
+                chunks.insert(0, chunk)
+                if sum(len(c) for c in chunks) >= n:
+                    break
+        return pd.concat(chunks, ignore_index=True).tail(n)
+
+    def recent_errors(self, n=3):
+        """Copie des `n` derniers messages d'erreur du flux."""
+        with self._lock:
+            return list(self.errors)[-n:]
+
+    def wait_for_update(self, since_version, timeout=None):
+        """Attend une version postérieure à `since_version` ; retourne la version courante."""
+        with self._updated:
+            self._updated.wait_for(lambda: self.version > since_version, timeout=timeout)
+            return self.version
+
+    # --- Surveillance en tâche de fond ---
+
+    def start(self, interval=2.0):
+        """Démarre (une seule fois) la surveillance périodique du répertoire et de la file."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+                self._thread.start()
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.scan_directory()
+                self.apply_pending()
+            except Exception as e:
+                # La surveillance ne doit jamais s'arrêter sur une erreur inattendue
+                with self._lock:
+                    self.errors.append(f"Erreur du flux : {e}")
+
+    # --- Interne ---
+
+    def _prepare(self, kind, raw):
+        """Valide un lot brut et calcule ses agrégats par (Site, Mois)."""
+        if kind == "sessions":
+            delta = prepare_session_delta(raw, self.catalog)
+            return delta, aggregate_sessions(delta)
+        scores = _numeric_columns(raw, SCORE_COLUMNS)
+        delta = self.catalog.to_categorical(raw)
+        delta["Date"] = _dates(raw)
+        for column, values in scores.items():
+            delta[column] = values
+        return delta, {}
+
+    def _totals(self, key):
+        """Totaux d'une cellule (Site, Mois), mis en cache jusqu'au prochain lot qui la touche."""
+        if key not in self._cell_totals:
+            self._cell_totals[key] = self._cells[key].sum()
+        return self._cell_totals[key]
+
+    @staticmethod
+    def _site_positions(chunk, offset):
+        """Positions des lignes de chaque site d'un lot, décalées de `offset`."""
+        return {site: positions + offset for site, positions in chunk.groupby("Site", observed=True).indices.items()}
+
+    def _view(self, name, sites):
+        with self._lock:
+            frame, built = self._frames.get(name, (None, 0))
+            chunks = self._chunks[name]
+            if built < len(chunks):
+                # Seuls les lots reçus depuis la dernière reconstitution sont ajoutés
+                frame = pd.concat(([frame] if frame is not None else []) + chunks[built:], ignore_index=True)
+                self._frames[name] = (frame, len(chunks))
+            if sites is None:
+                return frame
+            positions = [p[site] for p in self._positions[name] for site in sites if site in p]
+        return frame.take(np.sort(np.concatenate(positions))) if positions else frame.iloc[:0]
+
+
+# ============================================================
+# FLUX PARTAGÉS PAR LE PROCESSUS
+# ============================================================
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+def get_live_feed(lease, interval=2.0):
+    """
+    Retourne le flux en direct d'un jeu de données du registre, en le créant
+    et en le démarrant au besoin. Il n'existe qu'un flux par jeu de données,
+    partagé par toutes les sessions Streamlit ouvertes, et il surveille le
+    répertoire `WATCH_DIR` fixé par la configuration du serveur.
+    """
+    with _feeds_lock:
+        if lease.key not in _feeds:
+            feed = LiveFeed(lease.data["sessions"], lease.data["satisfaction"], watch_dir=WATCH_DIR)
+            feed.start(interval)
+            # Le flux conserve le bail pour que le registre n'évince pas l'historique qu'il utilise
+            _feeds[lease.key] = (feed, lease)
+        return _feeds[lease.key][0]
@@ -0,0 +1,148 @@
+"""
+Optimisation du plan de sessions du trimestre suivant.
+
+Le module propose, pour chaque couple Site × Formation, un nombre de sessions
+à ouvrir qui maximise le bénéfice attendu sous trois contraintes :
+- la demande estimée (inscriptions attendues sur le trimestre),
+- les salles disponibles par site,
+- les formateurs disponibles par catégorie de formation.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# ============================================================
+# ESTIMATION DES PARAMÈTRES À PARTIR DE L'HISTORIQUE
+# ============================================================
+
+def estimate_planning_inputs(df, growth=1.0, period_months=12):
+    """
+    Estime, pour chaque couple Site × Formation, la demande trimestrielle et
+    les paramètres économiques moyens d'une session à partir de l'historique.
+    """
+    inputs = df.groupby(["Site", "Formation"], observed=True).agg(
+        Catégorie=("Catégorie", "first"),
+        Inscrits=("Inscrits", "sum"),
+        Présents=("Présents", "sum"),
+        Capacité=("Capacité", "median"),
+        Coût=("Coût", "mean"),
+        PrixVente=("PrixVente", "mean")
+    ).reset_index()
+
+    inputs["Demande"] = inputs["Inscrits"] / period_months * 3 * growth
+    inputs["TauxPrésence"] = inputs["Présents"] / inputs["Inscrits"]
+    return inputs.drop(columns=["Inscrits", "Présents"])
+
+
+# ============================================================
+# SOLVEUR
+# ============================================================
+
+def optimize_session_plan(inputs, rooms_per_site=2, trainers_per_category=2, weeks=13, max_sessions=None):
+    """
+    Propose le plan de sessions du trimestre.
+
+    Chaque couple Site × Formation génère des sessions candidates de rang
+    k = 1, 2, ... : la k-ième session ne remplit que la demande restante après
+    les k - 1 premières, son bénéfice attendu est donc décroissant en k.
+    Les candidates rentables sont triées par bénéfice puis retenues par tours
+    vectorisés tant que les salles (`rooms_per_site` × `weeks` sessions par
+    site) et les formateurs (`trainers_per_category` × `weeks` sessions par
+    catégorie) le permettent. Les limites peuvent être des scalaires ou des
+    dictionnaires indexés par site / catégorie.
+    """
+    inputs = inputs.reset_index(drop=True)
+    capacity = np.maximum(inputs["Capacité"].to_numpy(dtype=float), 1)
+    demand = inputs["Demande"].to_numpy(dtype=float)
+
+    # Sessions candidates : une ligne par (couple, rang)
+    if max_sessions is None:
+        max_sessions = int(np.ceil((demand / capacity).max())) if len(inputs) else 0
+    pair = np.repeat(np.arange(len(inputs)), max_sessions)
+    rank = np.tile(np.arange(max_sessions), len(inputs))
+
+    expected = np.clip(demand[pair] - rank * capacity[pair], 0, capacity[pair])
+    revenue = expected * inputs["TauxPrésence"].to_numpy(dtype=float)[pair] * inputs["PrixVente"].to_numpy(dtype=float)[pair]
+    profit = revenue - inputs["Coût"].to_numpy(dtype=float)[pair]
+
+    keep = profit > 0
+    pair, rank, expected, revenue, profit = pair[keep], rank[keep], expected[keep], revenue[keep], profit[keep]
+
+    # Tri par bénéfice décroissant ; à bénéfice égal, le rang le plus faible d'abord
+    order = np.lexsort((rank, -profit))
+    pair, expected, revenue, profit = pair[order], expected[order], revenue[order], profit[order]
+
+    site_codes, sites = pd.factorize(inputs["Site"])
+    category_codes, categories = pd.factorize(inputs["Catégorie"])
+    site_of = site_codes[pair]
+    category_of = category_codes[pair]
+
+    site_limit = _limits(rooms_per_site, sites) * weeks
+    category_limit = _limits(trainers_per_category, categories) * weeks
+
+    selected = _select_within_limits(site_of, category_of, site_limit, category_limit)
+
+    plan = pd.DataFrame({
+        "pair": pair[selected],
+        "InscritsPrévus": expected[selected],
+        "RevenuPrévu": revenue[selected],
+        "BénéficePrévu": profit[selected]
+    }).groupby("pair").agg(
+        Sessions=("BénéficePrévu", "size"),
+        InscritsPrévus=("InscritsPrévus", "sum"),
+        RevenuPrévu=("RevenuPrévu", "sum"),
+        BénéficePrévu=("BénéficePrévu", "sum")
+    )
+
+    plan = inputs.loc[plan.index, ["Site", "Formation", "Catégorie", "Demande"]].join(plan)
+    plan["TauxRemplissagePrévu"] = (plan["InscritsPrévus"] / (plan["Sessions"] * capacity[plan.index]) * 100).round(1)
+    plan["InscritsPrévus"] = plan["InscritsPrévus"].round(0)
+    plan["Demande"] = plan["Demande"].round(1)
+    return plan.sort_values("BénéficePrévu", ascending=False).reset_index(drop=True)
+
+
+def _limits(limit, labels):
+    """Convertit une limite scalaire ou un dictionnaire en tableau aligné sur `labels`."""
+    if isinstance(limit, dict):
+        return np.array([limit.get(label, 0) for label in labels], dtype=float)
+    return np.full(len(labels), limit, dtype=float)
+
+
+def _select_within_limits(site_of, category_of, site_limit, category_limit):
+    """
+    Sélection gloutonne, vectorisée par tours, de candidates déjà triées.
+
+    À chaque tour, une candidate est retenue si elle tient dans les limites
+    en comptant toutes les candidates restantes qui la précèdent ; celles dont
+    le site ou la catégorie est déjà saturé sont écartées définitivement.
+    La première candidate restante est toujours tranchée, ce qui garantit la
+    terminaison, et en pratique quelques tours suffisent.
+    """
+    selected = np.zeros(len(site_of), dtype=bool)
+    remaining = np.arange(len(site_of))
+    site_used = np.zeros(len(site_limit))
+    category_used = np.zeros(len(category_limit))
+
+    while len(remaining):
+        sites = site_of[remaining]
+        categories = category_of[remaining]
+
+        saturated = (site_used[sites] >= site_limit[sites]) | (category_used[categories] >= category_limit[categories])
+        remaining = remaining[~saturated]
+        sites, categories = sites[~saturated], categories[~saturated]
+        if not len(remaining):
+            break
+
+        site_rank = pd.Series(sites).groupby(sites).cumcount().to_numpy()
+        category_rank = pd.Series(categories).groupby(categories).cumcount().to_numpy()
+        fits = (site_used[sites] + site_rank < site_limit[sites]) & \
+            (category_used[categories] + category_rank < category_limit[categories])
+
+        accepted = remaining[fits]
+        selected[accepted] = True
+        np.add.at(site_used, sites[fits], 1)
+        np.add.at(category_used, categories[fits], 1)
+        remaining = remaining[~fits]
+
+    return selected
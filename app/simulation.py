@@ -0,0 +1,187 @@
+"""
+Simulation Monte-Carlo d'une année de sessions sous hypothèses de prix,
+de coûts et de capacité.
+
+Chaque réplique tire une année complète de sessions : la demande (inscrits)
+et la capacité de chaque session sont rééchantillonnées parmi les sessions
+historiques de la même formation, la capacité ne servant que de plafond aux
+inscriptions. Les répliques sont traitées par lots sous forme de tableaux
+NumPy (répliques × sessions), éventuellement répartis sur plusieurs processus.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from catalog import load_catalog
+
+
+# ============================================================
+# CALIBRAGE SUR L'HISTORIQUE
+# ============================================================
+
+def calibrate_simulation(df, catalog=None):
+    """
+    Extrait les paramètres de la simulation : coût et prix de base par
+    formation (catalogue de référence), répartition des sessions par
+    Site × Formation, sessions historiques (inscrits, capacité) regroupées
+    par formation et nombre de sessions annuel (historique).
+    """
+    catalog = catalog or load_catalog()
+    formation_codes = catalog.formation_codes(df["Formation"])
+    site_codes = catalog.site_codes(df["Site"])
+
+    # Répartition observée des couples, indexés par code entier
+    pair_codes = formation_codes * len(catalog.sites) + site_codes
+    counts = np.bincount(pair_codes, minlength=len(catalog.formations) * len(catalog.sites))
+    observed = np.flatnonzero(counts)
+
+    # Sessions historiques triées par formation : celles de la formation f
+    # occupent les positions history_start[f] à history_start[f] + history_count[f] - 1
+    order = np.argsort(formation_codes, kind="stable")
+    history_count = np.bincount(formation_codes, minlength=len(catalog.formations))
+    history_start = np.concatenate([[0], np.cumsum(history_count)[:-1]])
+
+    return {
+        "formations": catalog.formations.to_numpy(),
+        "sites": catalog.sites.to_numpy(),
+        "base_cost": catalog.cost.astype(float),
+        "base_price": catalog.price.astype(float),
+        "pair_formation": observed // len(catalog.sites),
+        "pair_site": observed % len(catalog.sites),
+        "pair_probability": counts[observed] / counts.sum(),
+        "history_registrations": df["Inscrits"].to_numpy(dtype=float)[order],
+        "history_capacity": df["Capacité"].to_numpy(dtype=float)[order],
+        "history_start": history_start,
+        "history_count": history_count,
+        "n_sessions": len(df)
+    }
+
+
+def _factors(factors, formations):
+    """Convertit un dictionnaire {formation: facteur} en tableau aligné sur `formations`."""
+    factors = factors or {}
+    return np.array([factors.get(formation, 1.0) for formation in formations], dtype=float)
+
+
+# ============================================================
+# MOTEUR DE SIMULATION
+# ============================================================
+
+def _simulate_chunk(params, n_replicas, seed):
+    """
+    Simule `n_replicas` années de sessions et retourne, pour chaque réplique
+    et chaque groupe Formation × Site, la somme des bénéfices, la somme des
+    marges nettes et le nombre de sessions.
+    """
+    rng = np.random.default_rng(seed)
+    shape = (n_replicas, params["n_sessions"])
+
+    pair = rng.choice(len(params["pair_probability"]), size=shape, p=params["pair_probability"])
+    formation = params["pair_formation"][pair]
+
+    # Session historique de la même formation tirée au hasard : sa demande
+    # (ajustée par l'élasticité-prix) et sa capacité (ajustée par le scénario)
+    history = params["history_start"][formation] + np.floor(rng.random(shape) * params["history_count"][formation]).astype(int)
+    capacity = np.maximum(np.rint(params["history_capacity"][history] * params["capacity_factor"][formation]), 1)
+    demand_scale = params["price_factor"][formation] ** params["price_elasticity"]
+    demand = np.rint(params["history_registrations"][history] * demand_scale)
+
+    # La capacité plafonne les inscriptions sans créer de demande
+    registrations = np.clip(demand, 0, capacity)
+
+    attendance_low = np.where(registrations > 2, registrations - 2, registrations)
+    attendance = attendance_low + np.floor(rng.random(shape) * (registrations - attendance_low + 1))
+
+    cost = (params["base_cost"][formation] + rng.integers(-100, 101, size=shape)) * params["cost_factor"][formation]
+    price = (params["base_price"][formation] + rng.integers(-200, 201, size=shape)) * params["price_factor"][formation]
+    revenue = attendance * price
+    profit = revenue - cost
+    margin = np.divide(profit * 100, revenue, out=np.zeros(shape), where=revenue > 0)
+
+    # Agrégation par (réplique, Formation × Site) en une passe
+    n_pairs = len(params["pair_probability"])
+    group = (np.arange(n_replicas)[:, None] * n_pairs + pair).ravel()
+    size = n_replicas * n_pairs
+    profit_sum = np.bincount(group, weights=profit.ravel(), minlength=size)
+    margin_sum = np.bincount(group, weights=margin.ravel(), minlength=size)
+    count = np.bincount(group, minlength=size)
+
+    return np.stack([profit_sum, margin_sum, count]).reshape(3, n_replicas, n_pairs)
+
+
+def run_monte_carlo(df, n_replicas=1000, price_factors=None, cost_factors=None, capacity_factors=None,
+                    price_elasticity=0.0, chunk_size=500, n_jobs=1, seed=None, catalog=None):
+    """
+    Lance `n_replicas` simulations d'une année de sessions.
+
+    Les scénarios sont exprimés par formation sous forme de facteurs
+    multiplicatifs, par exemple `price_factors={"Formation permis CE": 1.1}`
+    pour une hausse de prix de 10 %. `price_elasticity` répercute la variation
+    de prix sur les inscriptions (0 = demande insensible au prix).
+    Avec `n_jobs > 1`, les lots de répliques sont répartis sur plusieurs
+    processus ; chaque lot a sa propre graine, dérivée de `seed`.
+
+    Retourne un DataFrame (Réplique, Formation, Site) → Bénéfice, MargeSomme
+    (somme des marges nettes des sessions, à diviser par Sessions pour la
+    marge moyenne, cf. `summarize_simulation`), Sessions.
+    """
+    params = calibrate_simulation(df, catalog)
+    params.update({
+        "price_factor": _factors(price_factors, params["formations"]),
+        "cost_factor": _factors(cost_factors, params["formations"]),
+        "capacity_factor": _factors(capacity_factors, params["formations"]),
+        "price_elasticity": price_elasticity
+    })
+
+    chunks = [min(chunk_size, n_replicas - start) for start in range(0, n_replicas, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    if n_jobs > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(_simulate_chunk, [params] * len(chunks), chunks, seeds))
+    else:
+        results = [_simulate_chunk(params, n, s) for n, s in zip(chunks, seeds)]
+
+    profit_sum, margin_sum, count = np.concatenate(results, axis=1)
+
+    n_pairs = len(params["pair_probability"])
+    index = pd.MultiIndex.from_arrays([
+        np.repeat(np.arange(n_replicas), n_pairs),
+        np.tile(params["formations"][params["pair_formation"]], n_replicas),
+        np.tile(params["sites"][params["pair_site"]], n_replicas)
+    ], names=["Réplique", "Formation", "Site"])
+
+    return pd.DataFrame({
+        "Bénéfice": profit_sum.ravel(),
+        "MargeSomme": margin_sum.ravel(),
+        "Sessions": count.ravel()
+    }, index=index)
+
+
+# ============================================================
+# SYNTHÈSE DES DISTRIBUTIONS
+# ============================================================
+
+def summarize_simulation(results, by="Formation"):
+    """
+    Résume les distributions simulées du bénéfice annuel et de la marge nette
+    moyenne par `by` ("Formation" ou "Site") : moyenne, quantiles 5 % / 50 % /
+    95 % et probabilité de perte.
+    """
+    per_replica = results.groupby(["Réplique", by]).sum()
+    per_replica["MargeNette"] = per_replica["MargeSomme"] / per_replica["Sessions"].where(per_replica["Sessions"] > 0)
+
+    grouped = per_replica.groupby(by)
+    summary = pd.DataFrame({
+        "BénéficeMoyen": grouped["Bénéfice"].mean(),
+        "BénéficeP5": grouped["Bénéfice"].quantile(0.05),
+        "BénéficeP50": grouped["Bénéfice"].quantile(0.5),
+        "BénéficeP95": grouped["Bénéfice"].quantile(0.95),
+        "ProbabilitéPerte": grouped["Bénéfice"].apply(lambda x: (x < 0).mean() * 100),
+        "MargeNetteMoyenne": grouped["MargeNette"].mean(),
+        "MargeNetteP5": grouped["MargeNette"].quantile(0.05),
+        "MargeNetteP95": grouped["MargeNette"].quantile(0.95)
+    })
+    return summary.round(1).sort_values("BénéficeMoyen", ascending=False)